@@ -11,19 +11,54 @@ Usage:
 """
 
 import argparse
-import base64
+import concurrent.futures
+import functools
+import http.client
 import json
+import mmap
 import os
+import random
 import sys
 import time
-import urllib.error
-import urllib.request
+import urllib.parse
+import uuid
 from pathlib import Path
 
+try:
+    # pybase64 dispatches to SIMD (AVX2/SSSE3) encode kernels — roughly an order
+    # of magnitude faster on multi-MB images. Fall back to stdlib base64.
+    from pybase64 import b64encode as _b64encode
+except ImportError:
+    from base64 import b64encode as _b64encode
 
+try:
+    # orjson serializes ~5x faster and works in bytes directly (no encode/decode hop),
+    # which dominates for vision payloads embedding multi-MB base64 strings.
+    # Fall back to stdlib when it isn't installed.
+    import orjson
+
+    def _json_dumps(data: dict) -> bytes:
+        return orjson.dumps(data)
+
+    def _json_loads(raw: bytes) -> dict:
+        return orjson.loads(raw)
+
+except ImportError:
+
+    def _json_dumps(data: dict) -> bytes:
+        return json.dumps(data).encode("utf-8")
+
+    def _json_loads(raw: bytes) -> dict:
+        return json.loads(raw)
+
+
+GRSAI_HOST = "grsaiapi.com"
 GRSAI_CHAT_URL = "https://grsaiapi.com/v1/chat/completions"
+GRSAI_FILES_URL = "https://grsaiapi.com/v1/files"
 MODEL = "gemini-3-pro"
 
+MIME_MAP = {"jpg": "jpeg", "jpeg": "jpeg", "png": "png", "webp": "webp", "gif": "gif"}
+
 REQUEST_TIMEOUT = 120   # seconds — Gemini can be slow on long tasks
 MAX_RETRIES = 3
 RETRY_DELAY = 4.0
@@ -39,36 +74,81 @@ def get_api_key(provided_key: str | None) -> str | None:
     return os.environ.get("GRSAI_API_KEY")
 
 
-def http_post(url: str, data: dict, api_key: str) -> dict:
-    body = json.dumps(data).encode("utf-8")
-    req = urllib.request.Request(
-        url,
-        data=body,
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}",
-        },
-        method="POST",
-    )
+# Keep-alive connection reused across retries, same pattern as the video
+# script. Also lets us open the TCP+TLS connection early, overlapped with the
+# image base64 encode (both cost real time and are independent).
+_connection: http.client.HTTPSConnection | None = None
+
+
+def _get_connection() -> http.client.HTTPSConnection:
+    global _connection
+    if _connection is None:
+        _connection = http.client.HTTPSConnection(GRSAI_HOST, timeout=REQUEST_TIMEOUT)
+    return _connection
+
+
+def _close_connection() -> None:
+    global _connection
+    if _connection is not None:
+        _connection.close()
+        _connection = None
+
+
+def _warm_connection() -> None:
+    """Open the TCP+TLS connection ahead of the first request (best effort)."""
     try:
-        with urllib.request.urlopen(req, timeout=REQUEST_TIMEOUT) as resp:
-            return json.loads(resp.read().decode("utf-8"))
-    except urllib.error.HTTPError as e:
-        body_text = e.read().decode("utf-8", errors="replace")
-        if e.code == 401:
-            raise RuntimeError(f"Unauthorized (HTTP 401): check your API key. Details: {body_text}")
-        if e.code == 429:
-            raise TransientError(f"HTTP 429: too many requests. Details: {body_text}")
-        if e.code >= 500:
-            raise TransientError(f"HTTP {e.code}: {body_text}")
-        raise RuntimeError(f"HTTP {e.code}: {body_text}")
-    except urllib.error.URLError as e:
-        raise TransientError(f"Could not connect to {url}: {e.reason}")
-    except TimeoutError:
-        raise TransientError(f"Request timed out after {REQUEST_TIMEOUT}s")
-
-
-def query_with_retry(payload: dict, api_key: str) -> dict:
+        _get_connection().connect()
+    except OSError:
+        _close_connection()  # the real request will retry and report properly
+
+
+@functools.lru_cache(maxsize=4)
+def _api_headers(api_key: str) -> dict:
+    """API headers are identical for every call with the same key; build once."""
+    return {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}",
+    }
+
+
+def http_post(url: str, data: dict | bytes, api_key: str) -> dict:
+    body = data if isinstance(data, bytes) else _json_dumps(data)
+    path = urllib.parse.urlsplit(url).path
+    headers = _api_headers(api_key)
+
+    for attempt in (1, 2):
+        conn = _get_connection()
+        try:
+            conn.request("POST", path, body=body, headers=headers)
+            resp = conn.getresponse()
+            raw = resp.read()
+        except (http.client.HTTPException, ConnectionError, OSError) as e:
+            _close_connection()
+            # The server may have dropped an idle keep-alive connection;
+            # reconnect once before treating it as a real network error.
+            if attempt == 1 and isinstance(
+                e, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+            ):
+                continue
+            if isinstance(e, TimeoutError):
+                raise TransientError(f"Request timed out after {REQUEST_TIMEOUT}s")
+            raise TransientError(f"Could not connect to {url}: {e}")
+
+        if resp.status >= 400:
+            body_text = raw.decode("utf-8", errors="replace")
+            if resp.status == 401:
+                raise RuntimeError(f"Unauthorized (HTTP 401): check your API key. Details: {body_text}")
+            if resp.status == 429:
+                raise TransientError(f"HTTP 429: too many requests. Details: {body_text}")
+            if resp.status >= 500:
+                raise TransientError(f"HTTP {resp.status}: {body_text}")
+            raise RuntimeError(f"HTTP {resp.status}: {body_text}")
+        return _json_loads(raw)
+
+    raise TransientError(f"Could not connect to {url}: connection dropped")
+
+
+def query_with_retry(payload: dict | bytes, api_key: str) -> dict:
     """Call the API with exponential backoff retry on transient errors."""
     delay = RETRY_DELAY
     last_error: Exception = RuntimeError("No attempts made")
@@ -80,7 +160,8 @@ def query_with_retry(payload: dict, api_key: str) -> dict:
             last_error = e
             if attempt < MAX_RETRIES:
                 print(f"Attempt {attempt} failed (will retry in {delay:.0f}s): {e}", file=sys.stderr)
-                time.sleep(delay)
+                # Jitter the backoff so simultaneous clients don't resubmit in sync.
+                time.sleep(delay * (1 + random.random() * 0.5))
                 delay = min(delay * 2, 30)
         except RuntimeError:
             raise  # Permanent error, don't retry
@@ -88,8 +169,8 @@ def query_with_retry(payload: dict, api_key: str) -> dict:
     raise last_error
 
 
-def load_image_as_base64(image_path: str) -> tuple[str, str]:
-    """Load image file and return (mime_type, base64_data)."""
+def load_image_as_base64(image_path: str) -> tuple[str, bytes]:
+    """Load image file and return (mime_type, base64_data as bytes)."""
     path = Path(image_path)
     if not path.exists():
         print(f"Error: Image not found: {image_path}", file=sys.stderr)
@@ -99,21 +180,83 @@ def load_image_as_base64(image_path: str) -> tuple[str, str]:
         sys.exit(1)
 
     ext = path.suffix.lower().lstrip(".")
-    mime_map = {"jpg": "jpeg", "jpeg": "jpeg", "png": "png", "webp": "webp", "gif": "gif"}
-    mime = mime_map.get(ext)
+    mime = MIME_MAP.get(ext)
     if not mime:
         print(f"Error: Unsupported image format '{ext}'. Use jpg, png, webp, or gif.", file=sys.stderr)
         sys.exit(1)
 
     try:
-        img_data = path.read_bytes()
+        size = path.stat().st_size
+        if size:
+            # Memory-map the file and encode straight from the mapping: b64encode
+            # accepts any buffer, so the raw image is never copied into a Python
+            # bytes object — only the base64 output is materialized.
+            with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                b64_data = _b64encode(mm)
+        else:
+            b64_data = b""
     except OSError as e:
         print(f"Error reading image: {e}", file=sys.stderr)
         sys.exit(1)
 
-    size_kb = len(img_data) // 1024
+    size_kb = size // 1024
     print(f"Loaded image: {image_path} ({size_kb} KB, {ext.upper()})")
-    return f"image/{mime}", base64.b64encode(img_data).decode("utf-8")
+    return f"image/{mime}", b64_data
+
+
+def upload_image(image_path: str, api_key: str) -> str | None:
+    """Upload the raw image via multipart/form-data; return its hosted URL.
+
+    Sending raw bytes avoids the 33% base64 inflation and the encode cost
+    entirely. Best effort: returns None whenever the files endpoint is
+    unavailable or the response has no usable URL, and the caller falls back
+    to the base64 data URI path.
+    """
+    path = Path(image_path)
+    mime = MIME_MAP.get(path.suffix.lower().lstrip("."))
+    if not mime:
+        return None
+    try:
+        img_data = path.read_bytes()
+    except OSError:
+        return None
+
+    boundary = uuid.uuid4().hex
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="purpose"\r\n\r\n'
+        f"vision\r\n"
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{path.name}"\r\n'
+        f"Content-Type: image/{mime}\r\n\r\n"
+    ).encode("utf-8")
+    body = head + img_data + f"\r\n--{boundary}--\r\n".encode("utf-8")
+    headers = {
+        "Content-Type": f"multipart/form-data; boundary={boundary}",
+        "Authorization": f"Bearer {api_key}",
+    }
+
+    conn = _get_connection()
+    try:
+        conn.request("POST", urllib.parse.urlsplit(GRSAI_FILES_URL).path, body=body, headers=headers)
+        resp = conn.getresponse()
+        raw = resp.read()
+    except (http.client.HTTPException, ConnectionError, OSError):
+        _close_connection()
+        return None
+    if resp.status >= 400:
+        # 404/405/415 etc. — the gateway doesn't take uploads; use base64
+        return None
+    try:
+        data = _json_loads(raw)
+    except ValueError:
+        return None
+
+    if isinstance(data, dict):
+        for container in (data, data.get("data")):
+            if isinstance(container, dict) and container.get("url"):
+                return container["url"]
+    return None
 
 
 def main():
@@ -134,12 +277,34 @@ def main():
         print("Set GRSAI_API_KEY environment variable or pass --api-key", file=sys.stderr)
         sys.exit(1)
 
-    # Build message content
+    # For vision, read+encode the image in a worker thread while the main
+    # thread opens the TCP+TLS connection and tries a multipart upload — the
+    # handshake (100-300ms) and the encode of a large image otherwise run back
+    # to back, and a successful upload makes the encode unnecessary entirely.
+    img_future = None
+    image_url = None
     if args.image:
-        mime_type, b64_data = load_image_as_base64(args.image)
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        img_future = pool.submit(load_image_as_base64, args.image)
+        _warm_connection()
+        image_url = upload_image(args.image, api_key)
+        if image_url:
+            print(f"Uploaded image via multipart (no base64): {image_url[:60]}...")
+
+    # Build message content. For vision, serialize the payload with a placeholder
+    # and splice the base64 bytes in once — embedding the base64 as a Python str
+    # would materialize the image ~3x (bytes -> str -> JSON str -> UTF-8 bytes).
+    b64_data = None
+    if image_url is not None:
+        content = [
+            {"type": "text", "text": args.prompt},
+            {"type": "image_url", "image_url": {"url": image_url}},
+        ]
+    elif img_future is not None:
+        mime_type, b64_data = img_future.result()
         content = [
             {"type": "text", "text": args.prompt},
-            {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{b64_data}"}},
+            {"type": "image_url", "image_url": {"url": "__IMG__"}},
         ]
     else:
         content = args.prompt
@@ -149,10 +314,13 @@ def main():
         messages.append({"role": "system", "content": args.system_prompt})
     messages.append({"role": "user", "content": content})
 
-    payload = {
+    payload: dict | bytes = {
         "model": MODEL,
         "messages": messages,
     }
+    if b64_data is not None:
+        data_uri = b'"data:' + mime_type.encode("ascii") + b";base64," + b64_data + b'"'
+        payload = _json_dumps(payload).replace(b'"__IMG__"', data_uri, 1)
 
     mode = "vision" if args.image else "text"
     print(f"Querying {MODEL} ({mode})...")
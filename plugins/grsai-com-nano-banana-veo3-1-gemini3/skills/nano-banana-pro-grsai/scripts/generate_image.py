@@ -12,8 +12,11 @@ Usage:
 
 import argparse
 import base64
+import functools
 import json
 import os
+import random
+import re
 import struct
 import sys
 import time
@@ -21,6 +24,26 @@ import urllib.error
 import urllib.request
 from pathlib import Path
 
+try:
+    # orjson serializes ~5x faster and works in bytes directly (no encode/decode hop),
+    # which matters when the payload embeds a multi-MB base64 input image.
+    # Fall back to stdlib when it isn't installed.
+    import orjson
+
+    def _json_dumps(data: dict) -> bytes:
+        return orjson.dumps(data)
+
+    def _json_loads(raw: bytes) -> dict:
+        return orjson.loads(raw)
+
+except ImportError:
+
+    def _json_dumps(data: dict) -> bytes:
+        return json.dumps(data).encode("utf-8")
+
+    def _json_loads(raw: bytes) -> dict:
+        return json.loads(raw)
+
 
 GRSAI_API_URL = "https://grsaiapi.com/v1/draw/nano-banana"
 GRSAI_RESULT_URL = "https://grsaiapi.com/v1/draw/result"
@@ -39,6 +62,11 @@ TRANSIENT_KEYWORDS = ("timeout", "network", "connection", "unavailable", "overlo
 # Errors that indicate a permanent failure — skip to next model
 PERMANENT_KEYWORDS = ("moderation", "nsfw", "invalid", "unauthorized", "forbidden", "not exist")
 
+# Compiled once: a single case-insensitive alternation scan beats a Python-level
+# loop of substring checks (and skips the .lower() copy of the message).
+_TRANSIENT_RE = re.compile("|".join(map(re.escape, TRANSIENT_KEYWORDS)), re.IGNORECASE)
+_PERMANENT_RE = re.compile("|".join(map(re.escape, PERMANENT_KEYWORDS)), re.IGNORECASE)
+
 
 def get_api_key(provided_key: str | None) -> str | None:
     if provided_key:
@@ -46,29 +74,33 @@ def get_api_key(provided_key: str | None) -> str | None:
     return os.environ.get("GRSAI_API_KEY")
 
 
-def http_post(url: str, data: dict, api_key: str) -> dict:
-    body = json.dumps(data).encode("utf-8")
+@functools.lru_cache(maxsize=4)
+def _api_headers(api_key: str) -> dict:
+    """API headers are identical for every call with the same key; build once."""
+    return {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}",
+    }
+
+
+def http_post(url: str, data: dict | bytes, api_key: str) -> dict:
+    body = data if isinstance(data, bytes) else _json_dumps(data)
     req = urllib.request.Request(
         url,
         data=body,
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}",
-        },
+        headers=_api_headers(api_key),
         method="POST",
     )
     with urllib.request.urlopen(req, timeout=30) as resp:
-        return json.loads(resp.read().decode("utf-8"))
+        return _json_loads(resp.read())
 
 
 def is_transient_error(msg: str) -> bool:
-    msg_lower = msg.lower()
-    return any(kw in msg_lower for kw in TRANSIENT_KEYWORDS)
+    return bool(_TRANSIENT_RE.search(msg))
 
 
 def is_permanent_error(msg: str) -> bool:
-    msg_lower = msg.lower()
-    return any(kw in msg_lower for kw in PERMANENT_KEYWORDS)
+    return bool(_PERMANENT_RE.search(msg))
 
 
 def submit_task(payload: dict, api_key: str) -> str:
@@ -79,23 +111,38 @@ def submit_task(payload: dict, api_key: str) -> str:
     return response["data"]["id"]
 
 
-def poll_result(task_id: str, api_key: str, poll_interval: float = 3.0, timeout: int = 300) -> dict:
-    """Poll for task result until succeeded, failed, or timeout."""
+def poll_result(task_id: str, api_key: str, poll_interval: float = 2.0, timeout: int = 300) -> dict:
+    """Poll for task result until succeeded, failed, or timeout.
+
+    poll_interval is the initial delay; it backs off toward max_interval with
+    jitter so fast generations still poll quickly without hammering the API
+    on slow ones.
+    """
+    max_interval = 15.0
+    delay = poll_interval
     deadline = time.time() + timeout
+    # Serialize the poll body once; it is identical for every iteration.
+    poll_body = _json_dumps({"id": task_id})
     while time.time() < deadline:
-        result = http_post(GRSAI_RESULT_URL, {"id": task_id}, api_key)
+        result = http_post(GRSAI_RESULT_URL, poll_body, api_key)
         if result.get("code") != 0:
             raise RuntimeError(f"Result API error: {result.get('msg')}")
         data = result["data"]
         status = data.get("status")
         progress = data.get("progress", 0)
-        print(f"  Progress: {progress}% ({status})")
+        # Overwrite one status line instead of printing a line per poll —
+        # avoids a wall of output on long runs.
+        print(f"  Progress: {progress}% ({status})", end="\r")
         if status == "succeeded":
+            print()
             return data
         if status == "failed":
+            print()
             reason = (data.get("failure_reason", "") + " " + data.get("error", "")).strip()
             raise RuntimeError(reason or "unknown failure")
-        time.sleep(poll_interval)
+        time.sleep(min(delay * (1 + random.random() * 0.3), max_interval))
+        delay = min(delay * 1.5, max_interval)
+    print()
     raise TimeoutError(f"Generation timed out after {timeout}s")
 
 
@@ -129,7 +176,8 @@ def try_generate(payload: dict, api_key: str, model: str, max_retries: int = 3)
 
         if attempt < max_retries:
             print(f"[{model}] Retrying in {delay:.0f}s...")
-            time.sleep(delay)
+            # Jitter the backoff so simultaneous clients don't resubmit in sync.
+            time.sleep(delay * (1 + random.random() * 0.5))
             delay = min(delay * 2, 60)
 
     raise last_error